@@ -1,8 +1,17 @@
 from typing import List, Dict, Any, Tuple, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import os
+import threading
+import re
+import hashlib
+import json
 import yaml
+import jinja2
 from loguru import logger
 import byzerllm
+from byzerllm.utils.str2model import to_model
+from byzerllm.utils.client import code_utils
 import pydantic
 import git
 from rich.console import Console
@@ -21,21 +30,268 @@ class NextQuery(pydantic.BaseModel):
     dependency_queries: List[str] = pydantic.Field(description="依赖的历史任务列表", default_factory=list)
 
 
-def load_yaml_config(yaml_file: str) -> Dict:
-    """加载YAML配置文件"""
+_NEXT_QUERY_LIST_ADAPTER = pydantic.TypeAdapter(List[NextQuery])
+
+
+def parse_next_queries(json_str: str) -> List[NextQuery]:
+    """由 pydantic-core 直接解析并校验 NextQuery 列表的 JSON，无需先 json.loads 再逐个构造模型"""
+    return _NEXT_QUERY_LIST_ADAPTER.validate_json(json_str)
+
+
+# 优先使用 libyaml 提供的 C 实现，解析速度明显快于纯 Python 的 SafeLoader
+_YamlSafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# YAML 解析结果缓存，键为 (真实路径, mtime_ns, size)，文件变化后自动失效
+_YAML_CACHE: "OrderedDict[tuple, Dict]" = OrderedDict()
+_YAML_CACHE_MAX_SIZE = 256
+_YAML_CACHE_LOCK = threading.Lock()
+
+# action 文件名，例如 000000000001_chat_action.yml，分组 1 为序号
+_ACTION_FILE_RE = re.compile(r'^(\d{3,})_.*\.yml\Z')
+
+# action 文件由 yaml.dump 生成，顶层键从行首开始；用于跳过不含 query/urls 的文件，
+# 行首锚定避免误匹配 dynamic_urls:、add_updated_urls: 等键
+_QUERY_KEY_RE = re.compile(rb'^query:', re.M)
+_URLS_KEY_RE = re.compile(rb'^urls:', re.M)
+
+# commit message 中记录的 action 文件标识，例如 auto_coder_000000000001_chat_action.yml_<md5>
+_RESPONSE_ID_RE = re.compile(r'auto_coder_\S+')
+
+
+def load_yaml_config(yaml_file: str, data: Optional[bytes] = None) -> Dict:
+    """
+    加载YAML配置文件，按 (路径, mtime, size) 缓存解析结果
+
+    Args:
+        yaml_file: YAML 文件路径
+        data: 调用方已读取的文件内容，缓存未命中时直接解析这份内容，避免再次读取文件
+    """
     try:
-        with open(yaml_file, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+        st = os.stat(yaml_file)
+        key = (os.path.realpath(yaml_file), st.st_mtime_ns, st.st_size)
+        with _YAML_CACHE_LOCK:
+            if key in _YAML_CACHE:
+                _YAML_CACHE.move_to_end(key)
+                return _YAML_CACHE[key]
+
+        if data is None:
+            with open(yaml_file, 'rb') as f:
+                data = f.read()
+        config = yaml.load(data, Loader=_YamlSafeLoader)
+
+        with _YAML_CACHE_LOCK:
+            _YAML_CACHE[key] = config
+            while len(_YAML_CACHE) > _YAML_CACHE_MAX_SIZE:
+                _YAML_CACHE.popitem(last=False)
+        return config
     except Exception as e:
         logger.error(f"Error loading yaml file {yaml_file}: {str(e)}")
         return {}
 
 
+# 文件 MD5 缓存，键为 (真实路径, mtime_ns, size)，与 _YAML_CACHE 一样按 LRU 淘汰
+_MD5_CACHE: "OrderedDict[tuple, str]" = OrderedDict()
+_MD5_CACHE_MAX_SIZE = 256
+_MD5_CACHE_LOCK = threading.Lock()
+
+
+def file_md5(file_path: str) -> str:
+    """计算文件的MD5，文件未变化时直接返回缓存结果"""
+    st = os.stat(file_path)
+    key = (os.path.realpath(file_path), st.st_mtime_ns, st.st_size)
+    with _MD5_CACHE_LOCK:
+        if key in _MD5_CACHE:
+            _MD5_CACHE.move_to_end(key)
+            return _MD5_CACHE[key]
+
+    with open(file_path, 'rb') as f:
+        if hasattr(hashlib, "file_digest"):
+            digest = hashlib.file_digest(f, 'md5').hexdigest()
+        else:
+            # Python 3.10 没有 hashlib.file_digest，按块读取
+            md5 = hashlib.md5()
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                md5.update(chunk)
+            digest = md5.hexdigest()
+
+    with _MD5_CACHE_LOCK:
+        _MD5_CACHE[key] = digest
+        while len(_MD5_CACHE) > _MD5_CACHE_MAX_SIZE:
+            _MD5_CACHE.popitem(last=False)
+    return digest
+
+
+# commit diff 缓存，键为 (commit sha, 截断长度)，commit 内容不可变因此不会过期。
+# 模块级共享，每次预测新建的 AutoGuessQuery 实例也能命中；按 diff 总字符数 LRU 淘汰
+_DIFF_CACHE: "OrderedDict[Tuple[str, Optional[int]], str]" = OrderedDict()
+_DIFF_CACHE_MAX_CHARS = 4 * 1024 * 1024
+_DIFF_CACHE_LOCK = threading.Lock()
+_diff_cache_chars = 0
+
+
+def _get_cached_diff(key: Tuple[str, Optional[int]]) -> Optional[str]:
+    with _DIFF_CACHE_LOCK:
+        diff = _DIFF_CACHE.get(key)
+        if diff is not None:
+            _DIFF_CACHE.move_to_end(key)
+        return diff
+
+
+def _put_cached_diff(key: Tuple[str, Optional[int]], diff: str):
+    global _diff_cache_chars
+    if len(diff) > _DIFF_CACHE_MAX_CHARS:
+        return
+    with _DIFF_CACHE_LOCK:
+        old = _DIFF_CACHE.pop(key, None)
+        if old is not None:
+            _diff_cache_chars -= len(old)
+        _DIFF_CACHE[key] = diff
+        _diff_cache_chars += len(diff)
+        while _diff_cache_chars > _DIFF_CACHE_MAX_CHARS:
+            _, evicted = _DIFF_CACHE.popitem(last=False)
+            _diff_cache_chars -= len(evicted)
+
+
+class DiffRef:
+    """
+    commit diff 的惰性引用，只有在模板中判断或渲染 diff 时才调用 git 获取，
+    每个 diff 按 max_size 截断，避免把超大的 diff 整个放进 prompt
+    """
+
+    def __init__(self, repo: git.Repo, sha: str, max_size: Optional[int] = None):
+        """
+        Args:
+            repo: Git 仓库对象
+            sha: commit sha
+            max_size: diff 的最大字符数，超出部分会被截断，None 表示不截断
+        """
+        self.repo = repo
+        self.sha = sha
+        self.max_size = max_size
+        self._diff: Optional[str] = None
+
+    def __bool__(self) -> bool:
+        # 获取失败或 diff 为空时为 False，模板中的 {% if diff %} 不会输出空的代码变更块
+        return bool(str(self))
+
+    def __str__(self) -> str:
+        if self._diff is None:
+            self._diff = self._fetch()
+        return self._diff
+
+    def _fetch(self) -> str:
+        key = (self.sha, self.max_size)
+        cached = _get_cached_diff(key)
+        if cached is not None:
+            return cached
+
+        try:
+            commit = self.repo.commit(self.sha)
+            if commit.parents:
+                diff = self.repo.git.diff(
+                    '--no-color', commit.parents[0].hexsha, self.sha)
+            else:
+                diff = self.repo.git.show('--no-color', self.sha)
+        except git.exc.GitCommandError as e:
+            logger.error(f"Git命令执行错误: {str(e)}")
+            return ""
+        except Exception as e:
+            logger.error(f"获取commit diff时出错: {str(e)}")
+            return ""
+
+        if self.max_size is not None and len(diff) > self.max_size:
+            diff = diff[:self.max_size] + "\n... (diff truncated)"
+
+        _put_cached_diff(key, diff)
+        return diff
+
+
+# guess_next_query 的 prompt 模板，模块加载时编译一次
+_GUESS_NEXT_QUERY_PROMPT = """
+根据历史开发任务，预测接下来可能的多个开发任务，按照可能性从高到低排序。
+
+输入数据格式：
+querie_with_urls 包含多个历史任务信息，每个任务由以下部分组成：
+1. query: 任务需求描述
+2. urls: 修改的文件路径列表
+3. diff: Git diff信息，展示具体的代码修改
+
+示例数据：
+<queries>
+{% for query,urls,diff in querie_with_urls %}
+## {{ query }}        
+
+修改的文件:
+{% for url in urls %}
+- {{ url }}
+{% endfor %}
+{% if diff %}
+
+代码变更:
+```diff
+{{ diff }}
+```
+{% endif %}        
+{% endfor %}
+</queries>
+
+分析要求：
+1. 分析历史任务的模式和规律
+   - 功能演进路径：项目功能是如何逐步完善的
+   - 代码变更模式：相似功能通常涉及哪些文件
+   - 依赖关系：新功能和已有功能的关联
+   
+2. 预测可能的任务时考虑：
+   - 完整性：现有功能是否有待完善的地方
+   - 扩展性：是否需要支持新的场景
+   - 健壮性：是否需要增加容错和异常处理
+   - 性能：是否有性能优化空间
+   - 交互性：是否需要改善用户体验
+   - 可维护性：是否需要重构或优化代码结构
+
+返回格式说明：
+返回一个JSON数组，数组中每个元素是一个NextQuery对象，按照可能性从高到低排序。每个对象包含：
+1. query: 任务的具体描述
+2. urls: 预计需要修改的文件列表
+3. priority: 优先级(1-5)
+4. reason: 为什么建议这个任务
+5. dependency_queries: 相关的历史任务列表
+
+示例返回：
+[
+    {
+        "query": "添加任务预测的单元测试",
+        "urls": ["tests/test_auto_guess_query.py"],
+        "priority": 5,
+        "reason": "确保任务预测功能的正确性和稳定性对项目质量至关重要",
+        "dependency_queries": ["实现任务预测功能"]
+    },
+    {
+        "query": "优化向量搜索性能",
+        "urls": ["src/autocoder/utils/search.py"],
+        "priority": 4,
+        "reason": "当前搜索速度较慢，需要添加向量索引提升性能",
+        "dependency_queries": ["实现向量搜索基础功能"]
+    }
+]
+
+注意：
+1. 每个预测的任务都应该具体且可执行，而不是抽象的目标
+2. 文件路径预测应该基于已有文件的实际路径
+3. reason应该详细解释为什么这个任务重要，以及为什么需要修改这些文件
+4. priority的指定需要考虑任务的紧迫性和重要性
+3. 建议返回最多{{ task_limit_size }}个不同优先级的任务，覆盖不同的改进方向
+"""
+
+_GUESS_NEXT_QUERY_TEMPLATE = jinja2.Template(_GUESS_NEXT_QUERY_PROMPT)
+
+
 class AutoGuessQuery:
     def __init__(self, llm: byzerllm.ByzerLLM,
                  project_dir: str,
                  skip_diff: bool = False,
-                 file_size_limit: int = 100):
+                 file_size_limit: int = 100,
+                 diff_size_limit: Optional[int] = 4096):
         """
         初始化 AutoGuessQuery
 
@@ -44,154 +300,211 @@ class AutoGuessQuery:
             project_dir: 项目根目录
             skip_diff: 是否跳过获取 diff 信息
             file_size_limit: 最多分析多少历史任务
+            diff_size_limit: 每个历史任务 diff 的最大字符数，默认 4096，None 表示不截断
         """
         self.project_dir = project_dir
         self.actions_dir = os.path.join(project_dir, "actions")
+        self.history_cache_path = os.path.join(
+            project_dir, ".auto-coder", "cache", "history_tasks.json")
         self.llm = llm
         self.file_size_limit = file_size_limit
         self.skip_diff = skip_diff
+        self.diff_size_limit = diff_size_limit
 
-    @byzerllm.prompt()
-    def guess_next_query(self, querie_with_urls: List[Tuple[str, List[str], str]], task_limit_size: int = 5) -> str:
+    def guess_next_query(self, querie_with_urls: List[Tuple[str, List[str], Any]], task_limit_size: int = 5) -> str:
         """
-        根据历史开发任务，预测接下来可能的多个开发任务，按照可能性从高到低排序。
-
-        输入数据格式：
-        querie_with_urls 包含多个历史任务信息，每个任务由以下部分组成：
-        1. query: 任务需求描述
-        2. urls: 修改的文件路径列表
-        3. diff: Git diff信息，展示具体的代码修改
-
-        示例数据：
-        <queries>
-        {% for query,urls,diff in querie_with_urls %}
-        ## {{ query }}        
-
-        修改的文件:
-        {% for url in urls %}
-        - {{ url }}
-        {% endfor %}
-        {% if diff %}
-
-        代码变更:
-        ```diff
-        {{ diff }}
-        ```
-        {% endif %}        
-        {% endfor %}
-        </queries>
-
-        分析要求：
-        1. 分析历史任务的模式和规律
-           - 功能演进路径：项目功能是如何逐步完善的
-           - 代码变更模式：相似功能通常涉及哪些文件
-           - 依赖关系：新功能和已有功能的关联
-           
-        2. 预测可能的任务时考虑：
-           - 完整性：现有功能是否有待完善的地方
-           - 扩展性：是否需要支持新的场景
-           - 健壮性：是否需要增加容错和异常处理
-           - 性能：是否有性能优化空间
-           - 交互性：是否需要改善用户体验
-           - 可维护性：是否需要重构或优化代码结构
-
-        返回格式说明：
-        返回一个JSON数组，数组中每个元素是一个NextQuery对象，按照可能性从高到低排序。每个对象包含：
-        1. query: 任务的具体描述
-        2. urls: 预计需要修改的文件列表
-        3. priority: 优先级(1-5)
-        4. reason: 为什么建议这个任务
-        5. dependency_queries: 相关的历史任务列表
-
-        示例返回：
-        [
-            {
-                "query": "添加任务预测的单元测试",
-                "urls": ["tests/test_auto_guess_query.py"],
-                "priority": 5,
-                "reason": "确保任务预测功能的正确性和稳定性对项目质量至关重要",
-                "dependency_queries": ["实现任务预测功能"]
-            },
-            {
-                "query": "优化向量搜索性能",
-                "urls": ["src/autocoder/utils/search.py"],
-                "priority": 4,
-                "reason": "当前搜索速度较慢，需要添加向量索引提升性能",
-                "dependency_queries": ["实现向量搜索基础功能"]
-            }
-        ]
-
-        注意：
-        1. 每个预测的任务都应该具体且可执行，而不是抽象的目标
-        2. 文件路径预测应该基于已有文件的实际路径
-        3. reason应该详细解释为什么这个任务重要，以及为什么需要修改这些文件
-        4. priority的指定需要考虑任务的紧迫性和重要性
-        3. 建议返回最多{{ task_limit_size }}个不同优先级的任务，覆盖不同的改进方向
+        生成预测下一步开发任务的 prompt，使用模块加载时编译好的模板渲染
+
+        Args:
+            querie_with_urls: 历史任务列表，每个元素为 (query, urls, diff)
+            task_limit_size: 返回的任务数量限制
+
+        Returns:
+            str: 渲染后的 prompt
         """
-        pass
+        return _GUESS_NEXT_QUERY_TEMPLATE.render(
+            querie_with_urls=querie_with_urls,
+            task_limit_size=task_limit_size
+        )
 
-    def parse_history_tasks(self) -> List[Dict]:
+    def _build_commit_index(self, repo: git.Repo) -> Dict[str, str]:
         """
-        解析历史任务信息
+        一次性扫描提交历史，建立 response_id 到 commit sha 的索引
+
+        Args:
+            repo: Git 仓库对象
+
+        Returns:
+            Dict[str, str]: 键为 commit message 中的 auto_coder_ 标识，值为 commit sha
+        """
+        index = {}
+        output = repo.git.log('--fixed-strings', '--grep=auto_coder_',
+                              '--format=%H%x1f%B%x1e')
+        for record in output.split('\x1e'):
+            sha, sep, message = record.strip().partition('\x1f')
+            if not sep:
+                continue
+            for response_id in _RESPONSE_ID_RE.findall(message):
+                # git log 从新到旧输出，保留最新的匹配
+                index.setdefault(response_id, sha)
+        return index
+
+    def _load_history_cache(self) -> Dict[str, Any]:
+        """
+        加载 parse_history_tasks 的磁盘缓存
 
         Returns:
-            List[Dict]: 每个字典包含一个历史任务的信息
+            Dict: 包含 head（缓存时的 HEAD sha）和 tasks（按文件名索引的任务信息）
         """
-        # 获取所有YAML文件
-        action_files = [
-            f for f in os.listdir(self.actions_dir)
-            if f[:3].isdigit() and "_" in f and f.endswith('.yml')
-        ]
+        try:
+            if os.path.exists(self.history_cache_path):
+                with open(self.history_cache_path, 'r', encoding='utf-8') as f:
+                    cache = json.load(f)
+                if isinstance(cache, dict) and isinstance(cache.get("tasks"), dict):
+                    return cache
+        except Exception as e:
+            logger.warning(f"Error loading history cache {self.history_cache_path}: {str(e)}")
+        return {"head": None, "tasks": {}}
 
-        # 按序号排序
-        def get_seq(name):
-            return int(name.split("_")[0])
+    def _save_history_cache(self, cache: Dict[str, Any]):
+        """
+        原子地写入 parse_history_tasks 的磁盘缓存
 
-        # 获取最新的action文件列表
-        action_files = sorted(action_files, key=get_seq)
-        action_files.reverse()
+        Args:
+            cache: 要保存的缓存内容
+        """
+        tmp_path = f"{self.history_cache_path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.history_cache_path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, ensure_ascii=False)
+            os.replace(tmp_path, self.history_cache_path)
+        except Exception as e:
+            logger.warning(f"Error saving history cache {self.history_cache_path}: {str(e)}")
 
-        action_files = action_files[:self.file_size_limit]
+    def _process_one_action(self, entry: os.DirEntry) -> Dict[str, Any]:
+        """
+        解析单个 action 文件，可在线程池中并发调用
 
-        querie_with_urls_and_diffs = []
-        repo = git.Repo(self.project_dir)
+        Args:
+            entry: action 文件对应的目录项
 
-        # 收集所有query、urls和对应的commit diff
-        for yaml_file in action_files:
-            yaml_path = os.path.join(self.actions_dir, yaml_file)
-            config = load_yaml_config(yaml_path)
+        Returns:
+            Dict: 包含 mtime_ns、size、query、urls，需要匹配 commit 时还包含文件 md5
+        """
+        st = entry.stat()
+        # 文件只读取一次，YAML 解析和 MD5 计算都使用同一份内容
+        with open(entry.path, 'rb') as f:
+            data = f.read()
+        config = {}
+        # 没有顶层 query 或 urls 的文件不会产生历史任务，跳过完整的 YAML 解析
+        if _QUERY_KEY_RE.search(data) and _URLS_KEY_RE.search(data):
+            config = load_yaml_config(entry.path, data) or {}
+        task = {
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "query": config.get('query', ''),
+            "urls": config.get('urls', []),
+        }
+        if not self.skip_diff and task["query"] and task["urls"]:
+            # 计算文件的MD5用于匹配commit
+            task["md5"] = hashlib.md5(data).hexdigest()
+        return task
+
+    def parse_history_tasks(self) -> List[Tuple[str, List[str], Any]]:
+        """
+        解析历史任务信息
 
-            if not config:
-                continue
+        已解析过的 action 文件信息（query、urls、md5 以及对应的 commit sha）会缓存在
+        .auto-coder/cache/history_tasks.json 中，只有 mtime 或 size 变化的文件才会重新解析。
+        commit diff 以 DiffRef 的形式返回，渲染 prompt 时才真正获取。
+
+        Returns:
+            List[Tuple[str, List[str], Any]]: 每个元素为 (query, urls, diff)，diff 为 DiffRef 或空字符串
+        """
+        # 获取所有YAML文件及其序号，scandir 返回的目录项会缓存 stat 信息供后续使用
+        with os.scandir(self.actions_dir) as it:
+            action_entries = []
+            for e in it:
+                m = _ACTION_FILE_RE.match(e.name)
+                if m:
+                    action_entries.append((int(m.group(1)), e))
+
+        # 按序号倒序，获取最新的action文件列表
+        action_entries.sort(key=lambda t: t[0], reverse=True)
+        action_entries = [e for _, e in action_entries[:self.file_size_limit]]
 
-            query = config.get('query', '')
-            urls = config.get('urls', [])
+        querie_with_urls_and_diffs = []
+        repo = git.Repo(self.project_dir)
+
+        try:
+            head_sha = repo.head.commit.hexsha
+        except Exception:
+            head_sha = None
+
+        cache = self._load_history_cache()
+        cached_tasks = cache["tasks"]
+        # HEAD 变化后（新提交、amend、rebase 等），所有文件都需要重新查找对应的 commit
+        head_changed = cache.get("head") != head_sha
+        tasks = {}
+
+        # 只有 mtime 或 size 变化的文件需要重新解析，IO 密集且相互独立，放到线程池中并发处理
+        stale_entries = []
+        for entry in action_entries:
+            st = entry.stat()
+            task = cached_tasks.get(entry.name)
+            if not task or task.get("mtime_ns") != st.st_mtime_ns or task.get("size") != st.st_size:
+                stale_entries.append(entry)
+            else:
+                # 复制一份，后续写入 diff_sha 等字段时不影响 cached_tasks，便于判断缓存是否变化
+                tasks[entry.name] = dict(task)
+        if stale_entries:
+            max_workers = min(len(stale_entries), os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for entry, task in zip(stale_entries, executor.map(self._process_one_action, stale_entries)):
+                    tasks[entry.name] = task
+
+        commit_index = None
+        # 同一个 commit 只创建一个 DiffRef
+        diff_refs: Dict[str, DiffRef] = {}
+
+        # 收集所有query、urls和对应的commit diff，GitPython 的 Repo 不是线程安全的，这里串行处理
+        for entry in action_entries:
+            yaml_file = entry.name
+            task = tasks[yaml_file]
+
+            query = task["query"]
+            urls = task["urls"]
 
             if query and urls:
                 commit_diff = ""
                 if not self.skip_diff:
-                    # 计算文件的MD5用于匹配commit
-                    import hashlib
-                    file_md5 = hashlib.md5(open(yaml_path, 'rb').read()).hexdigest()
-                    response_id = f"auto_coder_{yaml_file}_{file_md5}"
-                    # 查找对应的commit                   
-                    try:
-                        for commit in repo.iter_commits():
-                            if response_id in commit.message:
-                                if commit.parents:
-                                    parent = commit.parents[0]
-                                    commit_diff = repo.git.diff(
-                                        parent.hexsha, commit.hexsha)
-                                else:
-                                    commit_diff = repo.git.show(commit.hexsha)
-                                break
-                    except git.exc.GitCommandError as e:
-                        logger.error(f"Git命令执行错误: {str(e)}")
-                    except Exception as e:
-                        logger.error(f"获取commit diff时出错: {str(e)}")
+                    if "diff_sha" not in task or head_changed:
+                        if commit_index is None:
+                            try:
+                                commit_index = self._build_commit_index(repo)
+                            except git.exc.GitCommandError as e:
+                                logger.error(f"Git命令执行错误: {str(e)}")
+                                commit_index = {}
+                                head_sha = None
+                        if "md5" not in task:
+                            task["md5"] = file_md5(entry.path)
+                        response_id = f"auto_coder_{yaml_file}_{task['md5']}"
+                        # 查找对应的commit
+                        task["diff_sha"] = commit_index.get(response_id)
+
+                    sha = task["diff_sha"]
+                    if sha:
+                        if sha not in diff_refs:
+                            diff_refs[sha] = DiffRef(repo, sha, self.diff_size_limit)
+                        commit_diff = diff_refs[sha]
 
                 querie_with_urls_and_diffs.append((query, urls, commit_diff))
 
+        # 内容没有变化时（warm path）跳过整份 JSON 的序列化和写入
+        if cache.get("head") != head_sha or tasks != cached_tasks:
+            self._save_history_cache({"head": head_sha, "tasks": tasks})
+
         return querie_with_urls_and_diffs
 
     def predict_next_tasks(self, task_limit_size: int = 5, is_human_as_model: bool = False) -> Optional[List[NextQuery]]:
@@ -212,15 +525,13 @@ class AutoGuessQuery:
             return None
 
         try:
+            # 生成prompt
+            prompt_content = self.guess_next_query(
+                history_tasks, task_limit_size=task_limit_size)
+
             if is_human_as_model:                          
                 console = Console()
                 
-                # 生成prompt
-                prompt_content = self.guess_next_query.prompt(
-                    querie_with_urls=history_tasks,
-                    task_limit_size=task_limit_size
-                )
-                
                 try:
                     import pyperclip
                     pyperclip.copy(prompt_content)
@@ -261,22 +572,22 @@ class AutoGuessQuery:
                 result = "\n".join(lines)
                 
                 # 从输入中抽取JSON字符串并解析
-                from byzerllm.utils.client import code_utils
-                import json
-                
                 try:
                     json_str = code_utils.extract_code(result)[0][1]
-                    task_list = json.loads(json_str)
-                    return [NextQuery(**task) for task in task_list]
+                    return parse_next_queries(json_str)
                 except Exception as e:
                     logger.error(f"Error parsing input: {str(e)}")
                     return None
             else:
-                result = self.guess_next_query.with_llm(self.llm).with_return_type(NextQuery).run(
-                    querie_with_urls=history_tasks,
-                    task_limit_size=task_limit_size
-                )
-                return result
+                result = self.llm.chat_oai(
+                    conversations=[{"role": "user", "content": prompt_content}])
+                output = result[0].output
+                try:
+                    return parse_next_queries(code_utils.extract_code(output)[-1][1])
+                except ValueError:
+                    # 非严格 JSON（如 json5 或标签包裹的内容）或单个对象，交给 byzerllm 的宽松解析
+                    next_queries = to_model(output, NextQuery)
+                    return next_queries if isinstance(next_queries, list) else [next_queries]
         except Exception as e:
             import traceback
             traceback.print_exc()
@@ -420,6 +420,8 @@ class AutoCoderArgs(pydantic.BaseModel):
 
     enable_active_context: Optional[bool] = False
     enable_active_context_in_generate: Optional[bool] = False
+    active_context_workers: Optional[int] = 3
+    active_context_dir_workers: Optional[int] = 2
 
     generate_max_rounds: Optional[int] = 5
 
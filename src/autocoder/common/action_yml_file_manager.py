@@ -250,6 +250,25 @@ class ActionYmlFileManager:
         yaml_content[field] = value
         return self.save_yaml_content(file_name, yaml_content)
 
+    def _iter_commits_mentioning(self, repo: git.Repo, text: str):
+        """
+        借助 git log --grep 找出 commit message 中包含指定文本的所有 commit，
+        按从新到旧的顺序返回，避免在 Python 中逐个遍历全部提交历史
+
+        Args:
+            repo: Git 仓库对象
+            text: 要查找的文本（按固定字符串匹配）
+
+        Yields:
+            Tuple[str, str]: (commit sha, commit message)
+        """
+        output = repo.git.log('--fixed-strings', f'--grep={text}',
+                              '--format=%H%x1f%B%x1e')
+        for record in output.split('\x1e'):
+            sha, sep, message = record.strip().partition('\x1f')
+            if sep:
+                yield sha, message
+
     def get_all_commit_id_from_file(self,file_name:str):
         '''
         会包含 revert 信息
@@ -260,11 +279,10 @@ class ActionYmlFileManager:
             return []
         
         commit_hashes = []        
-        for commit in repo.iter_commits():
-            lines = commit.message.strip().split('\n')
+        for commit_hash, message in self._iter_commits_mentioning(repo, file_name):
+            lines = message.strip().split('\n')
             last_line = lines[-1]            
-            if file_name in last_line or (commit.message.startswith("<revert>") and file_name in commit.message):
-                commit_hash = commit.hexsha
+            if file_name in last_line or (message.startswith("<revert>") and file_name in message):
                 commit_hashes.append(commit_hash)
                 
         return commit_hashes
@@ -286,11 +304,11 @@ class ActionYmlFileManager:
             return None
         
         commit_hash = None
-        # 这里遍历从最新的commit 开始遍历
-        for commit in repo.iter_commits():
-            last_line = commit.message.strip().split('\n')[-1]
-            if file_name in last_line and not commit.message.startswith("<revert>"):
-                commit_hash = commit.hexsha
+        # 这里遍历从最新的commit 开始遍历，只检查 message 中包含文件名的 commit
+        for sha, message in self._iter_commits_mentioning(repo, file_name):
+            last_line = message.strip().split('\n')[-1]
+            if file_name in last_line and not message.startswith("<revert>"):
+                commit_hash = sha
                 break
         return commit_hash
     
@@ -1,14 +1,18 @@
 import os
 import sys
+import mmap
 import time
 import threading
 import queue
 import json
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, defaultdict
 from datetime import datetime
 from typing import List, Dict, Optional, Any, Tuple, Set
 from loguru import logger as global_logger
 import byzerllm
-import re
 from pydantic import BaseModel, Field
 
 from autocoder.common import AutoCoderArgs
@@ -18,6 +22,28 @@ from autocoder.memory.directory_mapper import DirectoryMapper
 from autocoder.memory.active_package import ActivePackage
 from autocoder.memory.async_processor import AsyncProcessor
 
+# active.md 中二级标题与解析结果字段的对应关系
+_ACTIVE_MD_SECTIONS = {
+    '当前变更': 'current_change',
+    '文档': 'document',
+}
+
+
+@functools.lru_cache(maxsize=512)
+def _get_active_context_path_cached(source_dir: str, directory_path: str) -> str:
+    """
+    计算源码目录在活动上下文中对应的目录路径，os.path.relpath 开销较大，因此缓存结果
+
+    Args:
+        source_dir: 项目根目录（绝对路径）
+        directory_path: 原始目录路径（绝对路径）
+
+    Returns:
+        str: 活动上下文中对应的目录路径
+    """
+    relative_path = os.path.relpath(directory_path, source_dir)
+    return os.path.join(source_dir, ".auto-coder", "active-context", relative_path)
+
 
 class ActiveFileSections(BaseModel):
     """活动文件内容的各个部分"""
@@ -68,17 +94,19 @@ class ActiveContextManager:
 
     # 任务队列和队列处理线程
     _task_queue = None
-    _queue_thread = None
+    _queue_threads: List[threading.Thread] = []
     _queue_lock = None
-    _is_processing = False
+    _busy_workers = 0
 
-    def __new__(cls, llm: byzerllm.ByzerLLM = None, args: AutoCoderArgs = None):
+    def __new__(cls, llm: byzerllm.ByzerLLM = None, args: AutoCoderArgs = None,
+                active_md_cache_size: int = 128):
         """
         实现单例模式，确保只创建一个实例
 
         Args:
             llm: ByzerLLM实例，用于生成文档内容
             args: AutoCoderArgs实例，包含配置信息
+            active_md_cache_size: active.md 解析结果缓存的最大条目数
 
         Returns:
             ActiveContextManager: 单例实例
@@ -88,12 +116,15 @@ class ActiveContextManager:
             cls._instance._is_initialized = False
         return cls._instance
 
-    def __init__(self, llm: byzerllm.ByzerLLM, source_dir: str):
+    def __init__(self, llm: byzerllm.ByzerLLM, source_dir: str,
+                 active_md_cache_size: int = 128):
         """
         初始化活动上下文管理器
 
         Args:
-            llm: ByzerLLM实例，用于生成文档内容            
+            llm: ByzerLLM实例，用于生成文档内容
+            source_dir: 项目根目录
+            active_md_cache_size: active.md 解析结果缓存的最大条目数
         """
         # 如果已经初始化过，则直接返回
         if self._is_initialized:
@@ -113,20 +144,26 @@ class ActiveContextManager:
         self.tasks_file_path = os.path.join(
             source_dir, ".auto-coder", "active-context", "tasks.json")
 
+        # 每个任务的日志文件目录
+        self.log_dir = os.path.join(
+            source_dir, ".auto-coder", "active-context", "logs")
+
         # 加载已存在的任务
         self.tasks = self._load_tasks_from_disk()
-        self.tasks_lock = threading.Lock()  # 添加锁以保护任务字典的操作
+        self.tasks_lock = threading.RLock()  # 添加锁以保护任务字典的操作
 
         self.printer = Printer()
 
-        # 初始化任务队列和锁
+        # active.md 解析结果缓存，键为 (路径, mtime_ns, size)，值为 (内容, 各部分字典)
+        self._active_md_cache: "OrderedDict[tuple, Tuple[str, Dict[str, str]]]" = OrderedDict()
+        self._active_md_cache_size = active_md_cache_size
+        self._active_md_cache_lock = threading.Lock()
+
+        # 初始化任务队列和锁，队列处理线程在首次提交任务时按 args.active_context_workers 启动
         self.__class__._task_queue = queue.Queue()
         self.__class__._queue_lock = threading.Lock()
-
-        # 启动队列处理线程
-        self.__class__._queue_thread = threading.Thread(
-            target=self._process_queue, daemon=True)
-        self.__class__._queue_thread.start()
+        self.__class__._queue_threads = []
+        self.__class__._busy_workers = 0
 
         # 标记为已初始化
         self._is_initialized = True
@@ -218,44 +255,52 @@ class ActiveContextManager:
         # 持久化到磁盘
         self._save_tasks_to_disk()
 
+    def _start_queue_workers(self, args: AutoCoderArgs):
+        """
+        启动处理任务队列的守护线程，只在第一次调用时启动
+
+        Args:
+            args: AutoCoderArgs实例，active_context_workers 指定线程数
+        """
+        with self._queue_lock:
+            if self._queue_threads:
+                return
+            workers = max(1, getattr(args, 'active_context_workers', None) or 3)
+            for _ in range(workers):
+                thread = threading.Thread(
+                    target=self._process_queue,
+                    daemon=True  # 使用守护线程，主程序退出时自动结束
+                )
+                thread.start()
+                self._queue_threads.append(thread)
+
     def _process_queue(self):
         """
         处理任务队列的后台线程
-        确保一次只有一个任务在运行
+        多个线程共同消费同一个队列，同时运行的任务数不超过线程数
         """
+        task_queue = self._task_queue
         while True:
+            # 从队列中获取任务
+            task = task_queue.get()
+            if task is None:
+                # None 是退出信号
+                task_queue.task_done()
+                break
+
+            # 设置处理标志
+            with self._queue_lock:
+                self.__class__._busy_workers += 1
             try:
-                # 从队列中获取任务
-                task = self._task_queue.get()
-                if task is None:
-                    # None 是退出信号
-                    break
-
-                # 设置处理标志
-                with self._queue_lock:
-                    self.__class__._is_processing = True
-
-                # 解包任务参数
-                task_id, query, changed_urls, current_urls = task
-
-                # 更新任务状态为运行中
-                self._update_task(task_id, status='running')
-
-                self._process_changes_async(
-                    task_id, query, changed_urls, current_urls)
-
-                # 重置处理标志
-                with self._queue_lock:
-                    self.__class__._is_processing = False
-
-                # 标记任务完成
-                self._task_queue.task_done()
-
+                self._execute_task_in_background(*task)
             except Exception as e:
                 self.logger.error(f"Error in queue processing thread: {e}")
+            finally:
                 # 重置处理标志，确保队列可以继续处理
                 with self._queue_lock:
-                    self.__class__._is_processing = False
+                    self.__class__._busy_workers -= 1
+                # 标记任务完成
+                task_queue.task_done()
 
     def process_changes(self, args: AutoCoderArgs) -> str:
         """
@@ -294,7 +339,7 @@ class ActiveContextManager:
                     'query': query,
                     'changed_urls': changed_urls,
                     'current_urls': current_urls,
-                    'queue_position': self._task_queue.qsize() + (1 if self._is_processing else 0),
+                    'queue_position': self._get_queue_position(),
                     'total_tokens': 0,  # 初始化token计数
                     'input_tokens': 0,  # 初始化输入token计数
                     'output_tokens': 0,  # 初始化输出token计数
@@ -303,16 +348,13 @@ class ActiveContextManager:
                 # 持久化任务信息
             self._save_tasks_to_disk()
 
-            # 直接启动后台线程处理任务，不通过队列
-            thread = threading.Thread(
-                target=self._execute_task_in_background,
-                args=(task_id, query, changed_urls, current_urls, args),
-                daemon=True  # 使用守护线程，主程序退出时自动结束
-            )
-            thread.start()
+            # 放入任务队列，由固定数量的守护线程依次处理
+            self._start_queue_workers(args)
+            self._task_queue.put(
+                (task_id, query, changed_urls, current_urls, args))
 
-            # 记录任务已启动，并立即返回
-            self.logger.info(f"Task {task_id} started in background thread")
+            # 记录任务已入队，并立即返回
+            self.logger.info(f"Task {task_id} added to the background task queue")
             return task_id
 
         except Exception as e:
@@ -324,7 +366,7 @@ class ActiveContextManager:
                                     changed_urls: List[str], current_urls: List[str],
                                     args: AutoCoderArgs):
         """
-        在后台线程中执行任务，处理所有日志重定向
+        在后台线程中执行任务，任务期间的日志会写入该任务独立的日志文件
 
         Args:
             task_id: 任务ID
@@ -332,23 +374,63 @@ class ActiveContextManager:
             changed_urls: 变更的文件列表
             current_urls: 当前相关的文件列表
         """
+        handler_id = self._add_task_log_sink(task_id)
         try:
-            # 更新任务状态为运行中
-            self._update_task(task_id, status='running')
+            with global_logger.contextualize(task_id=task_id):
+                # 更新任务状态为运行中
+                self._update_task(task_id, status='running')
 
-            # 重定向输出并执行任务
-            self._process_changes_async(
-                task_id, query, changed_urls, current_urls, args)
+                self._process_changes_async(
+                    task_id, query, changed_urls, current_urls, args)
 
-            # 更新任务状态为已完成
-            self._update_task(task_id, status='completed',
-                              completion_time=datetime.now())
+                # 更新任务状态为已完成
+                self._update_task(task_id, status='completed',
+                                  completion_time=datetime.now())
 
         except Exception as e:
             # 记录错误，但不允许异常传播到主线程
             error_msg = f"Background task {task_id} failed: {str(e)}"
             self.logger.error(error_msg)
             self._update_task(task_id, status='failed', error=error_msg)
+        finally:
+            if handler_id is not None:
+                global_logger.remove(handler_id)
+
+    def _get_queue_position(self) -> int:
+        """
+        计算新任务前面还有多少个任务：队列中等待的任务，所有线程都在忙时再加上一个正在运行的任务
+
+        Returns:
+            int: 新任务的排队位置，0 表示会立即开始处理
+        """
+        with self._queue_lock:
+            all_busy = bool(self._queue_threads) and self._busy_workers >= len(self._queue_threads)
+        return self._task_queue.qsize() + (1 if all_busy else 0)
+
+    def _add_task_log_sink(self, task_id: str) -> Optional[int]:
+        """
+        为任务添加 loguru 日志文件 sink，只接收绑定了该任务ID的日志。
+        使用 enqueue=True，写文件在 loguru 的后台线程中完成，不会阻塞任务，
+        也不需要替换进程级的 sys.stdout/sys.stderr。
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            Optional[int]: sink 的 handler id，添加失败时返回 None
+        """
+        try:
+            os.makedirs(self.log_dir, exist_ok=True)
+            return global_logger.add(
+                os.path.join(self.log_dir, f"{task_id}.log"),
+                level="DEBUG",
+                format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {extra[task_id]} | {message}",
+                filter=lambda record: record["extra"].get("task_id") == task_id,
+                enqueue=True,
+            )
+        except Exception as e:
+            self.logger.warning(f"无法为任务 {task_id} 创建日志文件: {e}")
+            return None
 
     def _process_changes_async(self, task_id: str, query: str, changed_urls: List[str], current_urls: List[str], args: AutoCoderArgs):
         """
@@ -374,7 +456,8 @@ class ActiveContextManager:
             self._update_task(task_id, status='running')
 
             # 获取当前任务的文件名
-            file_name = self.tasks[task_id].get('file_name')
+            with self.tasks_lock:
+                file_name = self.tasks[task_id].get('file_name')
             self.logger.info(f"任务关联文件: {file_name}")
 
             # 获取文件变更信息
@@ -404,33 +487,47 @@ class ActiveContextManager:
             output_tokens = 0
             cost = 0.0
 
-            for i, context in enumerate(directory_contexts):
-                dir_path = context['directory_path']
+            def process_directory(i: int, context: Dict[str, Any]):
                 self.logger.info(
-                    f"[{i+1}/{len(directory_contexts)}] 开始处理目录: {dir_path}")
-                try:
-                    result = self._process_directory_context(
-                        context, query, file_changes, args)
+                    f"[{i+1}/{len(directory_contexts)}] 开始处理目录: {context['directory_path']}")
+                return self._process_directory_context(context, query, file_changes, args)
+
+            # 各目录的活动文件相互独立（写入不同的 active.md），LLM 调用可以并发执行。
+            # 每个任务最多并发 active_context_dir_workers 个目录，
+            # 所有任务合计不超过 active_context_workers * active_context_dir_workers 个 LLM 调用
+            dir_workers = max(1, getattr(args, 'active_context_dir_workers', None) or 1)
+            max_workers = min(dir_workers, len(directory_contexts) or 1)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = []
+                for i, context in enumerate(directory_contexts):
+                    # 复制当前上下文，使工作线程中的日志同样带有 task_id，写入任务日志文件
+                    ctx = contextvars.copy_context()
+                    futures.append((context['directory_path'], executor.submit(
+                        ctx.run, process_directory, i, context)))
+
+                for dir_path, future in futures:
+                    try:
+                        result = future.result()
 
-                    # 如果返回了token和费用信息，则累加
-                    if isinstance(result, dict):
-                        dir_tokens = result.get('total_tokens', 0)
-                        dir_input_tokens = result.get('input_tokens', 0)
-                        dir_output_tokens = result.get('output_tokens', 0)
-                        dir_cost = result.get('cost', 0.0)
+                        # 如果返回了token和费用信息，则累加
+                        if isinstance(result, dict):
+                            dir_tokens = result.get('total_tokens', 0)
+                            dir_input_tokens = result.get('input_tokens', 0)
+                            dir_output_tokens = result.get('output_tokens', 0)
+                            dir_cost = result.get('cost', 0.0)
 
-                        total_tokens += dir_tokens
-                        input_tokens += dir_input_tokens
-                        output_tokens += dir_output_tokens
-                        cost += dir_cost
+                            total_tokens += dir_tokens
+                            input_tokens += dir_input_tokens
+                            output_tokens += dir_output_tokens
+                            cost += dir_cost
 
-                        self.logger.info(
-                            f"目录 {dir_path} 处理完成，使用了 {dir_tokens} tokens，费用 {dir_cost:.6f}")
+                            self.logger.info(
+                                f"目录 {dir_path} 处理完成，使用了 {dir_tokens} tokens，费用 {dir_cost:.6f}")
 
-                    processed_dirs.append(os.path.basename(dir_path))
+                        processed_dirs.append(os.path.basename(dir_path))
 
-                except Exception as e:
-                    self.logger.error(f"处理目录 {dir_path} 时出错: {str(e)}")
+                    except Exception as e:
+                        self.logger.error(f"处理目录 {dir_path} 时出错: {str(e)}")
 
             # 更新任务的token和费用信息
             self._update_task(
@@ -447,8 +544,9 @@ class ActiveContextManager:
                               status='completed',
                               completion_time=datetime.now())
 
-            duration = (datetime.now() -
-                        self.tasks[task_id]['start_time']).total_seconds()
+            with self.tasks_lock:
+                start_time = self.tasks[task_id]['start_time']
+            duration = (datetime.now() - start_time).total_seconds()
             self.logger.info(f"==== 任务 {task_id} 处理完成 ====")
             self.logger.info(f"总耗时: {duration:.2f}秒")
             self.logger.info(f"处理的目录数: {len(processed_dirs)}")
@@ -484,18 +582,17 @@ class ActiveContextManager:
             self.logger.debug(f"目标目录准备完成: {target_dir}")
 
             # 2. 检查是否有现有的active.md文件
-            existing_file_path = os.path.join(target_dir, "active.md")
-            if os.path.exists(existing_file_path):
-                self.logger.info(f"找到现有 active.md 文件: {existing_file_path}")
+            active_md_path = os.path.join(target_dir, "active.md")
+            if os.path.exists(active_md_path):
+                self.logger.info(f"找到现有 active.md 文件: {active_md_path}")
                 try:
-                    with open(existing_file_path, 'r', encoding='utf-8') as f:
+                    with open(active_md_path, 'r', encoding='utf-8') as f:
                         existing_content_preview = f.read(500)
                     self.logger.debug(
                         f"现有文件内容预览: {existing_content_preview[:100]}...")
                 except Exception as e:
                     self.logger.warning(f"无法读取现有文件内容: {str(e)}")
             else:
-                existing_file_path = None
                 self.logger.info(f"目录 {directory_path} 没有找到现有的 active.md 文件")
 
             # 记录目录中的文件信息
@@ -508,30 +605,26 @@ class ActiveContextManager:
             directory_changes = {}
             if file_changes:
                 self.logger.debug(f"开始筛选与目录相关的文件变更...")
-                # 获取当前目录下的所有文件路径
-                dir_files = []
-                for file_info in changed_files:
-                    file_path = file_info['path']
-                    dir_files.append(file_path)
-                    self.logger.debug(f"添加变更文件: {file_path}")
-
-                for file_info in current_files:
-                    file_path = file_info['path']
-                    dir_files.append(file_path)
-                    self.logger.debug(f"添加当前文件: {file_path}")
+                # 获取当前目录下的所有文件路径，使用集合保证成员检查为 O(1)
+                dir_files = {file_info['path'] for file_info in changed_files}
+                dir_files.update(file_info['path'] for file_info in current_files)
+                self.logger.debug(f"目录中共有 {len(dir_files)} 个文件")
 
                 # 从file_changes中获取当前目录文件的变更
-                for file_path, change_info in file_changes.items():
-                    if file_path in dir_files:
-                        directory_changes[file_path] = change_info
-                        old_content, new_content = change_info
-                        old_preview = old_content[:
-                                                  50] if old_content else "(空)"
-                        new_preview = new_content[:
-                                                  50] if new_content else "(空)"
-                        self.logger.debug(f"文件变更: {file_path}")
-                        self.logger.debug(f"  旧内容: {old_preview}...")
-                        self.logger.debug(f"  新内容: {new_preview}...")
+                directory_changes = {
+                    file_path: change_info
+                    for file_path, change_info in file_changes.items()
+                    if file_path in dir_files
+                }
+                for file_path, change_info in directory_changes.items():
+                    old_content, new_content = change_info
+                    old_preview = old_content[:
+                                              50] if old_content else "(空)"
+                    new_preview = new_content[:
+                                              50] if new_content else "(空)"
+                    self.logger.debug(f"文件变更: {file_path}")
+                    self.logger.debug(f"  旧内容: {old_preview}...")
+                    self.logger.debug(f"  新内容: {new_preview}...")
 
                 self.logger.info(
                     f"找到 {len(directory_changes)} 个与目录 {directory_path} 相关的文件变更")
@@ -547,7 +640,8 @@ class ActiveContextManager:
             generation_result = active_package.generate_active_file(
                 context,
                 query,
-                existing_file_path=existing_file_path,
+                # generate_active_file 会自行检查文件是否存在
+                existing_file_path=active_md_path,
                 file_changes=directory_changes,
                 args=args
             )
@@ -571,10 +665,16 @@ class ActiveContextManager:
                 self.logger.debug(f"内容预览: {markdown_content[:200]}...")
 
             # 4. 写入文件
-            active_md_path = os.path.join(target_dir, "active.md")
             self.logger.info(f"正在写入活动文件: {active_md_path}")
-            with open(active_md_path, "w", encoding="utf-8") as f:
-                f.write(markdown_content)
+            # 先写临时文件再原子替换，并发读取时不会读到写了一半的内容
+            tmp_path = f"{active_md_path}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(markdown_content.encode("utf-8"))
+                os.replace(tmp_path, active_md_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
 
             self.logger.info(f"成功创建/更新目录 {directory_path} 的活动文件")
             self.logger.debug(f"--- 处理目录上下文完成: {directory_path} ---")
@@ -597,11 +697,11 @@ class ActiveContextManager:
         Returns:
             Dict: 任务状态信息
         """
-        if task_id not in self.tasks:
-            return {'status': 'not_found', 'task_id': task_id}
-
+        # 在锁内复制一份任务信息，之后的计算不再受后台线程更新的影响
         with self.tasks_lock:
-            task = self.tasks[task_id]
+            if task_id not in self.tasks:
+                return {'status': 'not_found', 'task_id': task_id}
+            task = dict(self.tasks[task_id])
 
         # 计算任务运行时间
         start_time = task.get('start_time')
@@ -622,9 +722,7 @@ class ActiveContextManager:
         # 构建日志文件路径
         log_file_path = None
         if 'file_name' in task:
-            log_dir = os.path.join(
-                self.source_dir, '.auto-coder', 'active-context', 'logs')
-            log_file_path = os.path.join(log_dir, f'{task_id}.log')
+            log_file_path = os.path.join(self.log_dir, f'{task_id}.log')
             if not os.path.exists(log_file_path):
                 log_file_path = None
 
@@ -682,7 +780,9 @@ class ActiveContextManager:
         Returns:
             List[Dict]: 所有任务的状态信息
         """
-        return [{'task_id': tid, **task} for tid, task in self.tasks.items()]
+        with self.tasks_lock:
+            tasks = [(tid, dict(task)) for tid, task in self.tasks.items()]
+        return [{'task_id': tid, **task} for tid, task in tasks]
 
     def get_running_tasks(self) -> List[Dict[str, Any]]:
         """
@@ -691,7 +791,9 @@ class ActiveContextManager:
         Returns:
             List[Dict]: 所有正在运行的任务的状态信息
         """
-        return [{'task_id': tid, **task} for tid, task in self.tasks.items()
+        with self.tasks_lock:
+            tasks = [(tid, dict(task)) for tid, task in self.tasks.items()]
+        return [{'task_id': tid, **task} for tid, task in tasks
                 if task['status'] in ['running', 'queued']]
 
     def load_active_contexts_for_files(self, file_paths: List[str]) -> FileContextsResult:
@@ -710,13 +812,11 @@ class ActiveContextManager:
             # 记录未找到对应活动上下文的文件
             found_files: Set[str] = set()
 
-            # 1. 获取文件所在的唯一目录列表
-            directories = set()
+            # 1. 按所在目录对文件分组，每个目录只检查一次
+            files_by_dir: Dict[str, List[str]] = defaultdict(list)
             for file_path in file_paths:
-                # 获取文件所在的目录
-                dir_path = os.path.dirname(file_path)
-                if os.path.exists(dir_path):
-                    directories.add(dir_path)
+                files_by_dir[os.path.dirname(file_path)].append(file_path)
+            directories = [d for d in files_by_dir if os.path.isdir(d)]
 
             # 2. 查找每个目录的活动上下文文件
             for dir_path in directories:
@@ -727,17 +827,12 @@ class ActiveContextManager:
                 # 检查active.md文件是否存在
                 if os.path.exists(active_md_path):
                     try:
-                        # 读取文件内容
-                        with open(active_md_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-
-                        # 解析文件内容
-                        sections_dict = self._parse_active_md_content(content)
+                        # 读取并解析文件内容
+                        content, sections_dict = self._read_active_md(active_md_path)
                         sections = ActiveFileSections(**sections_dict)
 
                         # 找到相关的文件
-                        related_files = [
-                            f for f in file_paths if dir_path in f]
+                        related_files = files_by_dir[dir_path]
 
                         # 记录找到了对应活动上下文的文件
                         found_files.update(related_files)
@@ -769,10 +864,48 @@ class ActiveContextManager:
             self.logger.error(f"加载活动上下文失败: {e}")
             return FileContextsResult(not_found_files=file_paths)
 
+    def _read_active_md(self, active_md_path: str) -> Tuple[str, Dict[str, str]]:
+        """
+        读取并解析活动上下文文件，文件未变化时直接返回缓存结果
+
+        Args:
+            active_md_path: 活动上下文文件路径
+
+        Returns:
+            Tuple[str, Dict[str, str]]: 文件内容以及解析出的各个部分
+        """
+        st = os.stat(active_md_path)
+        key = (active_md_path, st.st_mtime_ns, st.st_size)
+        with self._active_md_cache_lock:
+            if key in self._active_md_cache:
+                self._active_md_cache.move_to_end(key)
+                return self._active_md_cache[key]
+
+        if st.st_size > 0:
+            # 通过 mmap 直接映射页缓存，避免先读入 Python 缓冲区再解码
+            with open(active_md_path, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                content = mm[:].decode('utf-8')
+            if '\r' in content:
+                # 与文本模式读取保持一致，统一换行符
+                content = content.replace('\r\n', '\n').replace('\r', '\n')
+        else:
+            content = ''
+        entry = (content, self._parse_active_md_content(content))
+
+        with self._active_md_cache_lock:
+            self._active_md_cache[key] = entry
+            while len(self._active_md_cache) > self._active_md_cache_size:
+                self._active_md_cache.popitem(last=False)
+        return entry
+
     def _parse_active_md_content(self, content: str) -> Dict[str, str]:
         """
         解析活动上下文文件内容，提取各个部分
 
+        只识别二级标题（"### 当前变更" 不算章节）；文件直接以二级标题开头时标题部分为空；
+        空章节不会吞掉后面的章节。
+
         Args:
             content: 活动上下文文件内容
 
@@ -786,23 +919,21 @@ class ActiveContextManager:
                 'document': ''
             }
 
-            # 提取标题部分（到第一个二级标题之前）
-            header_match = re.search(r'^(.*?)(?=\n## )', content, re.DOTALL)
-            if header_match:
-                result['header'] = header_match.group(1).strip()
-
-            # 提取当前变更部分
-            current_change_match = re.search(
-                r'## 当前变更\s*\n(.*?)(?=\n## |$)', content, re.DOTALL)
-            if current_change_match:
-                result['current_change'] = current_change_match.group(
-                    1).strip()
+            # 按二级标题切分，一次线性扫描即可得到各个部分
+            parts = content.split('\n## ')
+            if content.startswith('## '):
+                parts[0] = parts[0][3:]
+            else:
+                # 标题部分（到第一个二级标题之前）
+                header = parts.pop(0)
+                if parts:
+                    result['header'] = header.strip()
 
-            # 提取文档部分
-            document_match = re.search(
-                r'## 文档\s*\n(.*?)(?=\n## |$)', content, re.DOTALL)
-            if document_match:
-                result['document'] = document_match.group(1).strip()
+            for part in parts:
+                title, _, body = part.partition('\n')
+                key = _ACTIVE_MD_SECTIONS.get(title.strip())
+                if key and not result[key]:
+                    result[key] = body.strip()
 
             return result
         except Exception as e:
@@ -819,5 +950,6 @@ class ActiveContextManager:
         Returns:
             str: 活动上下文中对应的目录路径
         """
-        relative_path = os.path.relpath(directory_path, self.source_dir)
-        return os.path.join(self.source_dir, ".auto-coder", "active-context", relative_path)
+        # relpath 的结果依赖当前工作目录，缓存前先统一为绝对路径
+        return _get_active_context_path_cached(
+            os.path.abspath(self.source_dir), os.path.abspath(directory_path))
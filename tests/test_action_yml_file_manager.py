@@ -3,6 +3,7 @@ import tempfile
 import shutil
 import unittest
 import yaml
+import git
 from autocoder.common.action_yml_file_manager import ActionYmlFileManager
 
 
@@ -130,5 +131,56 @@ class TestActionYmlFileManager(unittest.TestCase):
         self.assertEqual(file_content, content)
 
 
+class TestActionYmlFileManagerCommits(unittest.TestCase):
+    def setUp(self):
+        # 创建临时 git 仓库
+        self.test_dir = tempfile.mkdtemp()
+        self.repo = git.Repo.init(self.test_dir)
+        with self.repo.config_writer() as cw:
+            cw.set_value("user", "name", "test")
+            cw.set_value("user", "email", "test@example.com")
+        self.action_manager = ActionYmlFileManager(self.test_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _commit(self, message):
+        self.repo.git.commit("--allow-empty", m=message)
+        return self.repo.head.commit.hexsha
+
+    def test_get_commit_id_from_file(self):
+        file_name = "000000000001_chat_action.yml"
+        self._commit("init")
+        sha = self._commit(f"update\nauto_coder_{file_name}_abc")
+        self._commit("unrelated")
+
+        self.assertEqual(self.action_manager.get_commit_id_from_file(file_name), sha)
+        self.assertEqual(self.action_manager.get_all_commit_id_from_file(file_name), [sha])
+        self.assertIsNone(self.action_manager.get_commit_id_from_file("000000000002_chat_action.yml"))
+        self.assertEqual(self.action_manager.get_all_commit_id_from_file("000000000002_chat_action.yml"), [])
+
+    def test_revert_commit(self):
+        # revert 提交只出现在 get_all_commit_id_from_file 的结果中
+        file_name = "000000000001_chat_action.yml"
+        self._commit("init")
+        message = f"update\nauto_coder_{file_name}_abc"
+        sha = self._commit(message)
+        revert_sha = self._commit(f"<revert>{message}\n{sha}")
+
+        self.assertEqual(self.action_manager.get_commit_id_from_file(file_name), sha)
+        self.assertEqual(self.action_manager.get_all_commit_id_from_file(file_name), [revert_sha, sha])
+
+    def test_file_name_with_regex_metacharacters(self):
+        # 文件名按字面匹配，不会被当作正则表达式
+        file_name = "000000000001_a.b+c[1]_chat_action.yml"
+        self._commit("init")
+        self._commit("update\nauto_coder_000000000001_axbbc1_chat_action.yml_abc")
+        sha = self._commit(f"update\nauto_coder_{file_name}_abc")
+        self._commit("update\nauto_coder_000000000001_axbbc1_chat_action.yml_def")
+
+        self.assertEqual(self.action_manager.get_commit_id_from_file(file_name), sha)
+        self.assertEqual(self.action_manager.get_all_commit_id_from_file(file_name), [sha])
+
+
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
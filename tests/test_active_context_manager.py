@@ -0,0 +1,225 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from autocoder.common import AutoCoderArgs
+from autocoder.memory.active_context_manager import ActiveContextManager
+
+
+class TestParseActiveMdContent(unittest.TestCase):
+    def setUp(self):
+        # ActiveContextManager 是单例，每个用例使用独立的实例
+        ActiveContextManager._instance = None
+        self.test_dir = tempfile.mkdtemp()
+        self.manager = ActiveContextManager(None, self.test_dir)
+
+    def tearDown(self):
+        ActiveContextManager._instance = None
+        shutil.rmtree(self.test_dir)
+
+    def parse(self, content):
+        return self.manager._parse_active_md_content(content)
+
+    def test_parse_all_sections(self):
+        content = "# 标题\n\n说明\n\n## 当前变更\n\n- a\n- b\n\n## 文档\n\n### 模块\n内容\n"
+        self.assertEqual(self.parse(content), {
+            'header': '# 标题\n\n说明',
+            'current_change': '- a\n- b',
+            'document': '### 模块\n内容',
+        })
+
+    def test_sections_in_any_order_with_trailing_spaces(self):
+        content = "# t\n## 文档  \nd\n## 其它\nx\n## 当前变更\nc"
+        self.assertEqual(self.parse(content), {
+            'header': '# t',
+            'current_change': 'c',
+            'document': 'd',
+        })
+
+    def test_no_sections(self):
+        self.assertEqual(self.parse("只有标题"), {
+            'header': '',
+            'current_change': '',
+            'document': '',
+        })
+
+    def test_leading_section_has_no_header(self):
+        # 文件直接以二级标题开头时没有标题部分，章节内容也不会被当作标题
+        content = "## 当前变更\nc\n## 文档\nd"
+        self.assertEqual(self.parse(content), {
+            'header': '',
+            'current_change': 'c',
+            'document': 'd',
+        })
+
+    def test_empty_section_does_not_swallow_next_section(self):
+        content = "# t\n## 当前变更\n\n## 文档\nd"
+        result = self.parse(content)
+        self.assertEqual(result['current_change'], '')
+        self.assertEqual(result['document'], 'd')
+
+    def test_nested_heading_is_not_a_section(self):
+        content = "# t\n## 文档\n### 当前变更\nnested"
+        result = self.parse(content)
+        self.assertEqual(result['current_change'], '')
+        self.assertEqual(result['document'], '### 当前变更\nnested')
+
+
+class TestBackgroundTaskConcurrency(unittest.TestCase):
+    def setUp(self):
+        ActiveContextManager._instance = None
+        self.test_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.test_dir, "actions"))
+        self.manager = ActiveContextManager(None, self.test_dir)
+
+    def tearDown(self):
+        # 通知队列处理线程退出
+        for _ in ActiveContextManager._queue_threads:
+            ActiveContextManager._task_queue.put(None)
+        ActiveContextManager._instance = None
+        shutil.rmtree(self.test_dir)
+
+    def test_tasks_run_on_bounded_daemon_workers(self):
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0, 'threads': set()}
+
+        def fake_process(*_):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+                state['threads'].add(threading.current_thread())
+            time.sleep(0.2)
+            with lock:
+                state['running'] -= 1
+
+        self.manager._process_changes_async = fake_process
+        task_ids = []
+        for i in range(6):
+            file_name = f"00000000000{i + 1}_chat_action.yml"
+            with open(os.path.join(self.test_dir, "actions", file_name), "w") as f:
+                f.write("query: q\nurls: []\n")
+            args = AutoCoderArgs(source_dir=self.test_dir, file=file_name, active_context_workers=2)
+            task_ids.append(self.manager.process_changes(args))
+        positions = [self.manager.tasks[t]['queue_position'] for t in task_ids]
+        ActiveContextManager._task_queue.join()
+
+        self.assertEqual(state['peak'], 2)
+        self.assertEqual(len(state['threads']), 2)
+        self.assertTrue(all(t.daemon for t in state['threads']))
+        # 两个线程都在忙时，后提交的任务需要排队
+        self.assertGreater(positions[-1], 0)
+        statuses = [self.manager.get_task_status(t)['status'] for t in task_ids]
+        self.assertEqual(statuses, ['completed'] * 6)
+
+    def test_directory_fan_out_is_bounded(self):
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0}
+
+        def fake_process_directory(*_):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            time.sleep(0.05)
+            with lock:
+                state['running'] -= 1
+            return {}
+
+        start_logs = []
+
+        def record_info(message, *_, **__):
+            if "开始处理目录" in message:
+                start_logs.append(threading.current_thread())
+
+        self.manager.tasks["task"] = {'status': 'queued', 'file_name': None, 'start_time': datetime.now()}
+        self.manager.directory_mapper.map_directories = mock.Mock(
+            return_value=[{'directory_path': f"d{i}"} for i in range(5)])
+        self.manager._process_directory_context = fake_process_directory
+        self.manager.logger = mock.Mock(info=mock.Mock(side_effect=record_info))
+        args = AutoCoderArgs(source_dir=self.test_dir, active_context_dir_workers=2)
+
+        self.manager._process_changes_async("task", "q", [], [], args)
+
+        self.assertEqual(state['peak'], 2)
+        self.assertEqual(self.manager.tasks["task"]['processed_dirs'], [f"d{i}" for i in range(5)])
+        # 开始处理的日志在工作线程中输出，而不是提交时在任务线程中一次性输出
+        self.assertEqual(len(start_logs), 5)
+        self.assertNotIn(threading.current_thread(), start_logs)
+
+
+class TestActiveContextPath(unittest.TestCase):
+    def setUp(self):
+        ActiveContextManager._instance = None
+        self.test_dir = os.path.realpath(tempfile.mkdtemp())
+        os.makedirs(os.path.join(self.test_dir, "a", "b"))
+        self.cwd = os.getcwd()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        ActiveContextManager._instance = None
+        shutil.rmtree(self.test_dir)
+
+    def test_relative_paths_follow_current_directory(self):
+        # 相同的相对路径参数在不同工作目录下应映射到不同位置
+        manager = ActiveContextManager(None, self.test_dir)
+        context_dir = os.path.join(self.test_dir, ".auto-coder", "active-context")
+
+        os.chdir(self.test_dir)
+        self.assertEqual(manager._get_active_context_path("b"),
+                         os.path.join(context_dir, "b"))
+
+        os.chdir(os.path.join(self.test_dir, "a"))
+        self.assertEqual(manager._get_active_context_path("b"),
+                         os.path.join(context_dir, "a", "b"))
+
+
+class TestLoadActiveContextsForFiles(unittest.TestCase):
+    def setUp(self):
+        ActiveContextManager._instance = None
+        self.test_dir = os.path.realpath(tempfile.mkdtemp())
+        self.manager = ActiveContextManager(None, self.test_dir)
+
+    def tearDown(self):
+        ActiveContextManager._instance = None
+        shutil.rmtree(self.test_dir)
+
+    def _path(self, *parts):
+        return os.path.join(self.test_dir, *parts)
+
+    def _touch(self, *parts):
+        os.makedirs(os.path.dirname(self._path(*parts)), exist_ok=True)
+        with open(self._path(*parts), "w") as f:
+            f.write("")
+        return self._path(*parts)
+
+    def _write_active_md(self, *parts):
+        context_dir = os.path.join(self.test_dir, ".auto-coder", "active-context", *parts)
+        os.makedirs(context_dir, exist_ok=True)
+        with open(os.path.join(context_dir, "active.md"), "w") as f:
+            f.write("# t\n## 当前变更\nc\n## 文档\nd\n")
+
+    def test_files_grouped_by_own_directory(self):
+        a = self._touch("src", "a.py")
+        b = self._touch("src", "sub", "b.py")
+        c = self._touch("src", "sub", "c.py")
+        d = self._touch("src", "other", "d.py")
+        self._write_active_md("src")
+        self._write_active_md("src", "sub")
+
+        result = self.manager.load_active_contexts_for_files([a, b, d, c])
+
+        self.assertEqual(set(result.contexts), {self._path("src"), self._path("src", "sub")})
+        # 子目录中的文件只归属于自己所在的目录，不会再挂到上级目录下
+        self.assertEqual(result.contexts[self._path("src")].files, [a])
+        self.assertEqual(result.contexts[self._path("src", "sub")].files, [b, c])
+        self.assertEqual(result.contexts[self._path("src", "sub")].sections.document, "d")
+        # 没有 active.md 的子目录不会回退到上级目录的活动上下文
+        self.assertEqual(result.not_found_files, [d])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,209 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import git
+
+from autocoder.agent import auto_guess_query
+from autocoder.agent.auto_guess_query import (
+    AutoGuessQuery, DiffRef, NextQuery, file_md5, load_yaml_config, parse_next_queries)
+
+
+class GitRepoTestCase(unittest.TestCase):
+    def setUp(self):
+        auto_guess_query._DIFF_CACHE.clear()
+        auto_guess_query._diff_cache_chars = 0
+        auto_guess_query._YAML_CACHE.clear()
+
+        # 创建带有 actions 目录的临时 git 仓库
+        self.test_dir = tempfile.mkdtemp()
+        self.repo = git.Repo.init(self.test_dir)
+        with self.repo.config_writer() as cw:
+            cw.set_value("user", "name", "test")
+            cw.set_value("user", "email", "test@example.com")
+
+        self.actions_dir = os.path.join(self.test_dir, "actions")
+        os.makedirs(self.actions_dir)
+        self.yaml_name = "000000000001_chat_action.yml"
+        self.yaml_path = os.path.join(self.actions_dir, self.yaml_name)
+        with open(self.yaml_path, "w") as f:
+            f.write("query: update f.py\nurls:\n- f.py\n")
+
+        self._write("f.py", "v0\n")
+        self.repo.git.add(A=True)
+        self.repo.git.commit(m="init")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _write(self, name, content):
+        with open(os.path.join(self.test_dir, name), "w") as f:
+            f.write(content)
+
+    def _commit_action(self, content, amend=False):
+        self._write("f.py", content)
+        self.repo.git.add("f.py")
+        message = f"update f.py\nauto_coder_{self.yaml_name}_{file_md5(self.yaml_path)}"
+        if amend:
+            self.repo.git.commit("--amend", m=message)
+        else:
+            self.repo.git.commit(m=message)
+
+
+class TestAutoGuessQueryHistoryCache(GitRepoTestCase):
+    def _diffs(self):
+        guesser = AutoGuessQuery(None, self.test_dir)
+        return [str(diff) for _, _, diff in guesser.parse_history_tasks()]
+
+    def test_history_tasks_cached(self):
+        self._commit_action("v1\n")
+        self._diffs()
+        self.assertTrue(os.path.exists(os.path.join(
+            self.test_dir, ".auto-coder", "cache", "history_tasks.json")))
+
+        diffs = self._diffs()
+        self.assertEqual(len(diffs), 1)
+        self.assertIn("+v1", diffs[0])
+
+    def test_unchanged_cache_is_not_rewritten(self):
+        self._commit_action("v1\n")
+        self._diffs()
+        with mock.patch.object(AutoGuessQuery, "_save_history_cache") as save:
+            self._diffs()
+        save.assert_not_called()
+
+        # action 文件变化后需要重新写入
+        with open(self.yaml_path, "a") as f:
+            f.write("dynamic_urls: []\n")
+        with mock.patch.object(AutoGuessQuery, "_save_history_cache") as save:
+            self._diffs()
+        save.assert_called_once()
+
+    def test_amended_commit_is_resolved_again(self):
+        self._commit_action("v1\n")
+        self.assertIn("+v1", self._diffs()[0])
+
+        # amend 之后 YAML 没有变化，但对应的 commit 已经不同
+        self._commit_action("v2-amended\n", amend=True)
+        diffs = self._diffs()
+        self.assertIn("+v2-amended", diffs[0])
+        self.assertNotIn("+v1", diffs[0])
+
+    def test_commit_added_after_first_parse(self):
+        self.assertEqual(self._diffs(), [""])
+
+        self._commit_action("v1\n")
+        self.assertIn("+v1", self._diffs()[0])
+
+
+class TestDiffRef(GitRepoTestCase):
+    def test_failed_fetch_is_falsy(self):
+        diff = DiffRef(self.repo, "0" * 40)
+        self.assertFalse(diff)
+        self.assertEqual(str(diff), "")
+
+        guesser = AutoGuessQuery(None, self.test_dir)
+        prompt = guesser.guess_next_query([("q", ["f.py"], diff)])
+        self.assertNotIn("```diff", prompt)
+
+    def test_diff_is_truncated(self):
+        self._commit_action("".join(f"line {i}\n" for i in range(1000)))
+        diff = DiffRef(self.repo, self.repo.head.commit.hexsha, max_size=100)
+        self.assertTrue(diff)
+        self.assertTrue(str(diff).endswith("... (diff truncated)"))
+        self.assertLess(len(str(diff)), 200)
+
+    def test_diff_shared_across_instances(self):
+        # 每次预测都会新建 AutoGuessQuery，diff 缓存需要在实例之间共享
+        self._commit_action("v1\n")
+        first = AutoGuessQuery(None, self.test_dir)
+        self.assertIn("+v1", str(first.parse_history_tasks()[0][2]))
+
+        second = AutoGuessQuery(None, self.test_dir)
+        with mock.patch.object(git.Repo, "commit", side_effect=AssertionError("git should not be called")):
+            self.assertIn("+v1", str(second.parse_history_tasks()[0][2]))
+
+    def test_diff_cache_bounded_by_size(self):
+        self._commit_action("v1\n")
+        first = self.repo.head.commit.hexsha
+        self._commit_action("v2\n")
+        second = self.repo.head.commit.hexsha
+
+        first_len = len(str(DiffRef(self.repo, first)))
+        with mock.patch.object(auto_guess_query, "_DIFF_CACHE_MAX_CHARS", first_len + 1):
+            str(DiffRef(self.repo, second))
+        self.assertEqual(list(auto_guess_query._DIFF_CACHE), [(second, None)])
+        self.assertLessEqual(auto_guess_query._diff_cache_chars, first_len + 1)
+
+
+class TestLoadYamlConfig(GitRepoTestCase):
+    def test_parse_cached_by_stat(self):
+        with open(self.yaml_path, "rb") as f:
+            data = f.read()
+        config = load_yaml_config(self.yaml_path, data)
+        self.assertEqual(config, {"query": "update f.py", "urls": ["f.py"]})
+
+        # 文件未变化时直接命中缓存，不再读取文件
+        with mock.patch("builtins.open", side_effect=AssertionError("file should not be read")):
+            self.assertIs(load_yaml_config(self.yaml_path), config)
+
+    def test_history_parse_reuses_bytes_read(self):
+        guesser = AutoGuessQuery(None, self.test_dir, skip_diff=True)
+        with mock.patch.object(auto_guess_query.yaml, "load", wraps=auto_guess_query.yaml.load) as load:
+            self.assertEqual(guesser.parse_history_tasks(), [("update f.py", ["f.py"], "")])
+        self.assertIsInstance(load.call_args[0][0], bytes)
+        self.assertIn(
+            (os.path.realpath(self.yaml_path), os.stat(self.yaml_path).st_mtime_ns, os.stat(self.yaml_path).st_size),
+            auto_guess_query._YAML_CACHE)
+
+    def test_file_without_top_level_urls_is_not_parsed(self):
+        # dynamic_urls: 不能被当作 urls:
+        with open(os.path.join(self.actions_dir, "000000000002_chat_action.yml"), "w") as f:
+            f.write("dynamic_urls:\n- g.py\nquery: other\n")
+        guesser = AutoGuessQuery(None, self.test_dir, skip_diff=True)
+        with mock.patch.object(auto_guess_query.yaml, "load", wraps=auto_guess_query.yaml.load) as load:
+            self.assertEqual(guesser.parse_history_tasks(), [("update f.py", ["f.py"], "")])
+        load.assert_called_once()
+        self.assertIn(b"urls:\n- f.py", load.call_args[0][0])
+
+
+class TestPredictNextTasksParsing(GitRepoTestCase):
+    TASK = {"query": "q", "urls": ["f.py"], "priority": 5, "reason": "r"}
+
+    def _predict(self, output):
+        llm = mock.Mock()
+        llm.chat_oai.return_value = [mock.Mock(output=output)]
+        guesser = AutoGuessQuery(llm, self.test_dir, skip_diff=True)
+        with mock.patch.object(auto_guess_query, "to_model", wraps=auto_guess_query.to_model) as to_model:
+            return guesser.predict_next_tasks(), to_model
+
+    def test_strict_json_uses_pydantic_parser(self):
+        output = '```json\n[{"query": "q", "urls": ["f.py"], "priority": 5, "reason": "r"}]\n```'
+        result, to_model = self._predict(output)
+        self.assertEqual(result, [NextQuery(**self.TASK)])
+        to_model.assert_not_called()
+
+    def test_json5_falls_back_to_to_model(self):
+        output = "```json\n[{'query': 'q', 'urls': ['f.py'], 'priority': 5, 'reason': 'r',},]\n```"
+        result, to_model = self._predict(output)
+        self.assertEqual(result, [NextQuery(**self.TASK)])
+        to_model.assert_called_once()
+
+    def test_single_object_is_wrapped_in_list(self):
+        output = '```json\n{"query": "q", "urls": ["f.py"], "priority": 5, "reason": "r"}\n```'
+        result, to_model = self._predict(output)
+        self.assertEqual(result, [NextQuery(**self.TASK)])
+        to_model.assert_called_once()
+
+    def test_parse_next_queries_requires_list(self):
+        self.assertEqual(
+            parse_next_queries('[{"query": "q", "urls": [], "priority": 1, "reason": "r"}]'),
+            [NextQuery(query="q", urls=[], priority=1, reason="r")])
+        with self.assertRaises(ValueError):
+            parse_next_queries('{"query": "q", "urls": [], "priority": 1, "reason": "r"}')
+
+
+if __name__ == "__main__":
+    unittest.main()